@@ -4,6 +4,7 @@ __all__ = [
     "replace",
     "remove",
     "extract",
+    "extract_separately",
     "insert",
     "move",
     "normalize_spans",
@@ -11,6 +12,9 @@ __all__ = [
     "clean_up_gaps_in_normalized_spans",
 ]
 
+import bisect
+import itertools
+
 from medkit.core.text.span import AnySpan, ModifiedSpan, Span
 
 
@@ -298,6 +302,63 @@ def _extract_in_spans(spans, ranges):
     return _remove_in_spans(spans, ranges_to_remove)
 
 
+def extract_separately(
+    text: str,
+    spans: list[AnySpan],
+    ranges: list[tuple[int, int]],
+) -> list[tuple[str, list[AnySpan]]]:
+    """Extract independently several parts of a text as well as their associated spans.
+
+    This is equivalent to calling :func:`extract` with each range, but `spans`
+    are not traversed again for each range, which is faster when there are
+    many ranges to extract from a text with many spans.
+
+    Parameters
+    ----------
+    text : str
+        The text to extract parts from
+    spans : list of AnySpan
+        The spans associated with `text`
+    ranges : list of tuple of int
+        The ranges of the parts to extract (end excluded), in any order
+
+    Returns
+    -------
+    list of tuple
+        The extracted text and its associated spans, for each range
+
+    Examples
+    --------
+    >>> text = "Hello, my name is John Doe."
+    >>> spans = [Span(0, 13), Span(20, 34)]
+    >>> ranges = [(0, 5), (18, 22)]
+    >>> for extracted_text, extracted_spans in extract_separately(text, spans, ranges):
+    ...     print(extracted_text, extracted_spans)
+    Hello [Span(start=0, end=5)]
+    John [Span(start=25, end=29)]
+    """
+    # end of each span in "relative" coords (can be compared to range start/end)
+    # and indices of the first and last spans overlapping with each range
+    span_ends = list(itertools.accumulate(span.length for span in spans))
+    first_indices = [bisect.bisect_right(span_ends, start) for start, _ in ranges]
+    last_indices = [bisect.bisect_left(span_ends, end) for _, end in ranges]
+
+    # validate params
+    assert len(text) == (span_ends[-1] if span_ends else 0), "Total span length should be equal to text length"
+    assert _ranges_are_within_text(text, ranges), "Ranges should be within of text"
+
+    extracted = []
+    for (start, end), first_index, last_index in zip(ranges, first_indices, last_indices):
+        if start == end:
+            extracted.append(("", []))
+            continue
+        # only extract from the spans overlapping with the range
+        offset = span_ends[first_index - 1] if first_index > 0 else 0
+        extracted_spans = _extract_in_spans(spans[first_index : last_index + 1], [(start - offset, end - offset)])
+        extracted.append((text[start:end], extracted_spans))
+    return extracted
+
+
 def insert(
     text: str,
     spans: list[AnySpan],
@@ -2,14 +2,36 @@ from __future__ import annotations
 
 __all__ = ["DucklingMatcher"]
 
+import functools
+import json
+import threading
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
 from typing import Iterator
+from urllib.parse import urlencode
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+try:
+    # faster JSON decoding of the server responses, if available
+    import orjson
+except ImportError:
+    orjson = None
 
 from medkit.core import Attribute
 from medkit.core.text import Entity, NEROperation, Segment, span_utils
 
+# number of consecutive server failures after which requests are no longer sent
+_MAX_CONSECUTIVE_FAILURES = 3
+# delay (in seconds) during which requests are refused once the server is considered down
+_FAILURE_COOLDOWN = 30.0
+# the Duckling server only reads form parameters (JSON bodies are not supported)
+_FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
 
 class DucklingMatcher(NEROperation):
     """Entity annotator using Duckling (https://github.com/facebook/duckling).
@@ -25,6 +47,10 @@ class DucklingMatcher(NEROperation):
 
     This command will start a Duckling server listening on port <PORT>.
     The version of the server is identified by <TAG>
+
+    The connection to the server is checked the first time the annotator is run.
+    If the server fails to answer several times in a row, subsequent calls will
+    fail immediately without reaching the server for a short period of time.
     """
 
     def __init__(
@@ -35,6 +61,8 @@ class DucklingMatcher(NEROperation):
         locale: str = "fr_FR",
         dims: list[str] | None = None,
         attrs_to_copy: list[str] | None = None,
+        max_workers: int = 4,
+        cache_size: int | None = 1024,
         uid: str | None = None,
     ):
         """Instantiate the Duckling matcher.
@@ -55,6 +83,14 @@ class DucklingMatcher(NEROperation):
             Labels of the attributes that should be copied from the source segment
             to the created entity. Useful for propagating context attributes
             (negation, antecendent, etc)
+        max_workers : int, default=4
+            Maximum number of requests sent concurrently to the server.
+            Use 1 to send requests one after the other.
+        cache_size : int, optional
+            Maximum number of server responses kept in memory to avoid sending
+            the same text twice across calls to `run`. Use 0 to disable caching
+            and None for an unbounded cache. Duplicate texts within the same
+            call are always sent only once.
         uid : str, optional
             Identifier of the matcher
         """
@@ -72,8 +108,39 @@ class DucklingMatcher(NEROperation):
         self.locale: str = locale
         self.dims: list[str] | None = dims
         self.attrs_to_copy: list[str] = attrs_to_copy
+        self.max_workers: int = max_workers
+        self.cache_size: int | None = cache_size
 
-        self._test_connection()
+        # part of the payload that is the same for all requests, encoded once
+        base_payload = {"locale": locale}
+        if dims is not None:
+            # manually encode dim strings because we need to be like
+            # 'dims=["time", "duration"]' and not 'dims=time&dims=duration'
+            # also note that we must use double quotes, not single quotes
+            base_payload["dims"] = json.dumps(dims)
+        self._encoded_base_payload: str = urlencode(base_payload)
+        self._dims_set: frozenset[str] | None = None if dims is None else frozenset(dims)
+
+        # reuse keep-alive connections across requests to the server
+        self._session = requests.Session()
+        # keep at least one connection per worker thread so that none is discarded
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max(32, max_workers),
+            max_retries=Retry(total=2, backoff_factor=0.1),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        # locale and dims do not change after init so the text is enough as key,
+        # failed requests raise and are therefore never cached
+        self._post_parse_cached = functools.lru_cache(maxsize=cache_size)(self._post_parse)
+
+        # connection is checked lazily on first run
+        self._connection_checked = False
+        # circuit breaker state, shared by worker threads
+        self._failure_lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._refuse_until = 0.0
 
     def run(self, segments: list[Segment]) -> list[Entity]:
         """Return entities for each match in `segments`.
@@ -88,42 +155,94 @@ class DucklingMatcher(NEROperation):
         list of Entity
             Entities found in `segments`
         """
-        return [entity for segment in segments for entity in self._find_matches_in_segment(segment)]
-
-    def _find_matches_in_segment(self, segment: Segment) -> Iterator[Entity]:
-        payload = {
-            "locale": self.locale,
-            "text": segment.text,
-        }
-        if self.dims is not None:
-            # manually encode dim strings because we need to be like
-            # 'dims=["time", "duration"]' but requests will encode it to 'dims=time&dims=duration'
-            # also note that we must use double quotes, not single quotes
-            payload["dims"] = str(self.dims).replace("'", '"')
-        api_result = requests.post(f"{self.url}/parse", data=payload, timeout=10)
-        api_result.raise_for_status()
+        return list(self.iter_run(segments))
 
-        matches = api_result.json()
-        for match in matches:
-            if self.dims is not None and match["dim"] not in self.dims:
-                warnings.warn("Dims are not properly filtered by duckling API call", stacklevel=2)
-                continue
+    def iter_run(self, segments: list[Segment]) -> Iterator[Entity]:
+        """Yield entities for each match in `segments`, as soon as they are found.
+
+        Contrary to :meth:`run`, entities are not accumulated in a list, and the
+        entities of a segment can be consumed while the requests for the
+        following segments are still pending.
+
+        Parameters
+        ----------
+        segments : list of Segment
+            List of segments into which to look for matches
+
+        Returns
+        -------
+        Iterator of Entity
+            Entities found in `segments`
+        """
+        # no match can be found in empty segments
+        segments = [segment for segment in segments if segment.text.strip()]
+        if not self._connection_checked:
+            self._test_connection()
+
+        all_matches = self._iter_parse([segment.text for segment in segments])
+        for segment, matches in zip(segments, all_matches):
+            yield from self._find_matches_in_segment(segment, matches)
+
+    def _iter_parse(self, texts: list[str]) -> Iterator[list[dict]]:
+        """Yield the raw matches for each text in `texts`, in the same order.
+
+        Requests are sent concurrently when `max_workers` allows it, and the
+        matches of each text are yielded as soon as they are available so that
+        the caller can build entities while the remaining requests are in flight.
+        Duplicate texts are only sent once, as concurrent requests for the same
+        text would all miss the cache.
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        if self.max_workers > 1 and len(unique_texts) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique_texts))) as executor:
+                yield from self._decode_in_order(texts, executor.map(self._post_parse_cached, unique_texts))
+        else:
+            yield from self._decode_in_order(texts, map(self._post_parse_cached, unique_texts))
+
+    @staticmethod
+    def _decode_in_order(texts: list[str], unique_contents: Iterator[bytes]) -> Iterator[list[dict]]:
+        """Yield the decoded matches for each text in `texts`.
+
+        `unique_contents` must contain the server responses for each distinct
+        text of `texts`, in order of first occurrence.
+        """
+        contents_by_text = {}
+        for text in texts:
+            if text not in contents_by_text:
+                contents_by_text[text] = next(unique_contents)
+            content = contents_by_text[text]
+            # decode for each text so that entities never share match objects
+            yield json.loads(content) if orjson is None else orjson.loads(content)
+
+    def _post_parse(self, text: str) -> bytes:
+        payload = f"{self._encoded_base_payload}&{urlencode({'text': text})}"
+        return self._request("POST", f"{self.url}/parse", data=payload, headers=_FORM_HEADERS).content
 
-            text, spans = span_utils.extract(segment.text, segment.spans, [(match["start"], match["end"])])
+    def _find_matches_in_segment(self, segment: Segment, matches: list[dict]) -> Iterator[Entity]:
+        # attributes to copy are the same for all entities of the segment
+        attrs_to_copy = [attr for label in self.attrs_to_copy for attr in segment.attrs.get(label=label)]
 
+        if self._dims_set is not None:
+            filtered_matches = [match for match in matches if match["dim"] in self._dims_set]
+            if len(filtered_matches) < len(matches):
+                warnings.warn("Dims are not properly filtered by duckling API call", stacklevel=2)
+            matches = filtered_matches
+
+        ranges = [(match["start"], match["end"]) for match in matches]
+        extracted = span_utils.extract_separately(segment.text, segment.spans, ranges)
+        for match, (text, spans) in zip(matches, extracted):
             entity = Entity(
                 label=match["dim"],
                 text=text,
                 spans=spans,
             )
 
-            for label in self.attrs_to_copy:
-                for attr in segment.attrs.get(label=label):
-                    copied_attr = attr.copy()
-                    entity.attrs.add(copied_attr)
-                    # handle provenance
-                    if self._prov_tracer is not None:
-                        self._prov_tracer.add_prov(copied_attr, self.description, [attr])
+            for attr in attrs_to_copy:
+                copied_attr = attr.copy()
+                entity.attrs.add(copied_attr)
+                # handle provenance
+                if self._prov_tracer is not None:
+                    self._prov_tracer.add_prov(copied_attr, self.description, [attr])
 
             norm_attr = Attribute(
                 label=self.output_label,
@@ -140,6 +259,38 @@ class DucklingMatcher(NEROperation):
 
             yield entity
 
+    def close(self):
+        """Close the connections opened to the Duckling server."""
+        self._session.close()
+
     def _test_connection(self):
-        api_result = requests.get(self.url, timeout=10)
-        api_result.raise_for_status()
+        self._request("GET", self.url)
+        self._connection_checked = True
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request to the server, unless it failed too many times recently."""
+        if time.monotonic() < self._refuse_until:
+            msg = f"Duckling server at {self.url} failed {_MAX_CONSECUTIVE_FAILURES} times in a row, retry later"
+            raise requests.ConnectionError(msg)
+
+        try:
+            api_result = self._session.request(method, url, timeout=10, **kwargs)
+            api_result.raise_for_status()
+        except requests.HTTPError as err:
+            if err.response is not None and err.response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                self._record_failure()
+            raise
+        except (requests.ConnectionError, requests.Timeout):
+            self._record_failure()
+            raise
+
+        with self._failure_lock:
+            self._consecutive_failures = 0
+        return api_result
+
+    def _record_failure(self):
+        with self._failure_lock:
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= _MAX_CONSECUTIVE_FAILURES:
+                self._refuse_until = time.monotonic() + _FAILURE_COOLDOWN
+                self._consecutive_failures = 0
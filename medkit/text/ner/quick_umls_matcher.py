@@ -2,7 +2,12 @@ from __future__ import annotations
 
 __all__ = ["QuickUMLSMatcher"]
 
-from typing import TYPE_CHECKING, ClassVar, Iterator, NamedTuple
+import functools
+import heapq
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, ClassVar, Iterator, NamedTuple
 
 import quickumls.about
 import quickumls.constants
@@ -39,6 +44,52 @@ def _fix_spacy_language_map():
     _spacy_language_map_fixed = True
 
 
+# QuickUMLS.match() runs the spacy pipeline on each text. Starting from 1.4.1,
+# matching can be performed on an already parsed doc, so texts can be parsed in batches
+_MATCH_FROM_DOC_SUPPORTED = parse_version(quickumls.about.__version__) >= parse_version("1.4.1")
+_SPACY_BATCH_SIZE = 64
+
+
+def _match_texts(matcher: QuickUMLS, texts: list[str]) -> Iterator[list[list[dict]]]:
+    """Yield the QuickUMLS matches for each text in `texts`, in the same order."""
+    if not _MATCH_FROM_DOC_SUPPORTED:
+        for text in texts:
+            yield matcher.match(text)
+        return
+
+    for doc in matcher.nlp.pipe(texts, batch_size=_SPACY_BATCH_SIZE):
+        yield matcher._match(doc)
+
+
+# QuickUMLS instance of a worker process, created once by _init_worker()
+_worker_matcher: QuickUMLS | None = None
+
+
+def _init_worker(quickumls_kwargs: dict[str, Any]):
+    global _worker_matcher  # noqa: PLW0603
+    _fix_spacy_language_map()
+    _worker_matcher = QuickUMLS(**quickumls_kwargs)
+
+
+def _match_texts_in_worker(texts: list[str]) -> list[list[list[dict]]]:
+    return list(_match_texts(_worker_matcher, texts))
+
+
+def _split_by_length(texts: list[str], nb_chunks: int) -> list[list[int]]:
+    """Split the indices of `texts` into chunks of similar total text length.
+
+    Longest texts are assigned first, each to the chunk with the lowest total
+    length so far (greedy "longest processing time" scheduling).
+    """
+    chunks = [[] for _ in range(nb_chunks)]
+    loads = [(0, chunk_index) for chunk_index in range(nb_chunks)]
+    for index in sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True):
+        load, chunk_index = heapq.heappop(loads)
+        chunks[chunk_index].append(index)
+        heapq.heappush(loads, (load + len(texts[index]), chunk_index))
+    return [chunk for chunk in chunks if chunk]
+
+
 class _QuickUMLSInstall(NamedTuple):
     version: str
     language: str
@@ -84,6 +135,7 @@ class QuickUMLSMatcher(NEROperation):
     """
 
     _install_paths: ClassVar[dict[_QuickUMLSInstall, str]] = {}
+    _executor: ProcessPoolExecutor | None = None
 
     @classmethod
     def add_install(
@@ -113,13 +165,16 @@ class QuickUMLSMatcher(NEROperation):
         """
         install = _QuickUMLSInstall(version, language, lowercase, normalize_unicode)
         cls._install_paths[install] = str(path)
+        cls._get_path_to_install.cache_clear()
 
     @classmethod
     def clear_installs(cls):
         """Remove all QuickUMLS installation registered with `add_install`."""
         cls._install_paths.clear()
+        cls._get_path_to_install.cache_clear()
 
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def _get_path_to_install(
         cls,
         version: str,
@@ -130,6 +185,7 @@ class QuickUMLSMatcher(NEROperation):
         """Find a QuickUMLS install with corresponding settings.
 
         The QuickUMLS install must have been previously registered with `add_install`.
+        Results are cached until installs are added or cleared.
         """
         install = _QuickUMLSInstall(version, language, lowercase, normalize_unicode)
         path = cls._install_paths.get(install)
@@ -156,6 +212,8 @@ class QuickUMLSMatcher(NEROperation):
         accepted_semtypes: list[str] = quickumls.constants.ACCEPTED_SEMTYPES,
         attrs_to_copy: list[str] | None = None,
         output_label: str | dict[str, str] | None = None,
+        n_jobs: int = 1,
+        cache_size: int | None = 8192,
         name: str | None = None,
         uid: str | None = None,
     ):
@@ -195,6 +253,16 @@ class QuickUMLSMatcher(NEROperation):
             entity labels. Use this parameter to override them. Example:
             `{"DISO": "problem", "PROC": "test}`. If `output_labels_by_semgroup`
             is a string, all entities will use this string as label instead.
+        n_jobs : int, default=1
+            Number of worker processes used to match segments in parallel,
+            -1 meaning one worker per CPU. Each worker loads its own QuickUMLS
+            install, so this is only worth it for large numbers of segments.
+            Workers are stopped when the matcher is deleted, or earlier by
+            calling :meth:`close`.
+        cache_size : int, optional
+            Maximum number of segment texts for which matches are kept in memory,
+            to avoid matching the same text twice. Use 0 to disable caching and
+            None for an unbounded cache.
         name : str, optional
             Name describing the matcher (defaults to the class name)
         uid : str, optional
@@ -220,16 +288,24 @@ class QuickUMLSMatcher(NEROperation):
         self.window = window
         self.accepted_semtypes = accepted_semtypes
         self.attrs_to_copy = attrs_to_copy
+        if n_jobs < 1 and n_jobs != -1:
+            msg = f"Invalid n_jobs {n_jobs}, must be -1 or a positive integer"
+            raise ValueError(msg)
+
+        self.n_jobs = n_jobs
+        self.cache_size = cache_size
+        self._nb_workers = (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
 
         path_to_install = self._get_path_to_install(version, language, lowercase, normalize_unicode)
-        self._matcher = QuickUMLS(
-            quickumls_fp=path_to_install,
-            overlapping_criteria=overlapping,
-            threshold=threshold,
-            window=window,
-            similarity_name=similarity,
-            accepted_semtypes=accepted_semtypes,
-        )
+        self._quickumls_kwargs = {
+            "quickumls_fp": path_to_install,
+            "overlapping_criteria": overlapping,
+            "threshold": threshold,
+            "window": window,
+            "similarity_name": similarity,
+            "accepted_semtypes": accepted_semtypes,
+        }
+        self._matcher = QuickUMLS(**self._quickumls_kwargs)
         assert (  # noqa: PT018
             self._matcher.language_flag == language
             and self._matcher.to_lowercase_flag == lowercase
@@ -239,6 +315,12 @@ class QuickUMLSMatcher(NEROperation):
         self._semtype_to_semgroup = umls_utils.load_semgroups_by_semtype()
         self.label_mapping = self._get_label_mapping(output_label)
 
+        # worker processes are started on first parallel run
+        self._executor = None
+        # matches by text, least recently used first
+        # (install and matching params cannot change after init)
+        self._matches_cache: OrderedDict[str, list[list[dict]]] = OrderedDict()
+
     @staticmethod
     def _get_label_mapping(output_label: None | str | dict[str, str]) -> dict[str, str]:
         """Return label mapping according to `output_label`."""
@@ -267,16 +349,100 @@ class QuickUMLSMatcher(NEROperation):
         list of Entity
             Entities found in `segments`, with :class:`~UMLSNormAttribute` attributes.
         """
-        return [entity for segment in segments for entity in self._find_matches_in_segment(segment)]
+        return list(self.iter_run(segments))
+
+    def iter_run(self, segments: list[Segment]) -> Iterator[Entity]:
+        """Yield entities (with UMLS normalization attributes) for each match in `segments`.
 
-    def _find_matches_in_segment(self, segment: Segment) -> Iterator[Entity]:
-        matches = self._matcher.match(segment.text)
-        for match_candidates in matches:
-            # only the best matching CUI (1st match candidate) is returned
-            # TODO should we create a normalization attributes for each CUI instead?
-            match = match_candidates[0]
+        Contrary to :meth:`run`, entities are not accumulated in a list but
+        created one segment at a time, as they are consumed.
+
+        Parameters
+        ----------
+        segments : list of Segment
+            List of segments into which to look for matches
+
+        Returns
+        -------
+        Iterator of Entity
+            Entities found in `segments`, with :class:`~UMLSNormAttribute` attributes.
+        """
+        # no match can be found in empty segments
+        segments = [segment for segment in segments if segment.text.strip()]
+        texts = [segment.text for segment in segments]
+        all_matches = self._match_texts_with_cache(texts)
+        for segment, matches in zip(segments, all_matches):
+            yield from self._find_matches_in_segment(segment, matches)
+
+    def _match_texts_with_cache(self, texts: list[str]) -> list[list[list[dict]]]:
+        """Return the QuickUMLS matches for each text, only matching texts not seen before."""
+        matches_by_text = {}
+        texts_to_match = []
+        for text in texts:
+            if text in matches_by_text:
+                continue
+            matches = self._matches_cache.get(text)
+            if matches is None:
+                matches_by_text[text] = None
+                texts_to_match.append(text)
+            else:
+                self._matches_cache.move_to_end(text)
+                matches_by_text[text] = matches
+
+        if self._nb_workers > 1 and len(texts_to_match) > 1:
+            new_matches = self._match_texts_in_parallel(texts_to_match)
+        else:
+            new_matches = _match_texts(self._matcher, texts_to_match)
+        for text, matches in zip(texts_to_match, new_matches):
+            matches_by_text[text] = matches
+            self._add_to_cache(text, matches)
+
+        return [matches_by_text[text] for text in texts]
+
+    def _add_to_cache(self, text: str, matches: list[list[dict]]):
+        if self.cache_size == 0:
+            return
+        self._matches_cache[text] = matches
+        if self.cache_size is not None and len(self._matches_cache) > self.cache_size:
+            self._matches_cache.popitem(last=False)
+
+    def close(self):
+        """Stop the worker processes used when `n_jobs` is not 1."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __del__(self):
+        self.close()
+
+    def _match_texts_in_parallel(self, texts: list[str]) -> list[list[list[dict]]]:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._nb_workers,
+                initializer=_init_worker,
+                initargs=(self._quickumls_kwargs,),
+            )
 
-            text, spans = span_utils.extract(segment.text, segment.spans, [(match["start"], match["end"])])
+        chunks = _split_by_length(texts, self._nb_workers)
+        results = self._executor.map(_match_texts_in_worker, [[texts[i] for i in chunk] for chunk in chunks])
+
+        # restore original order of texts
+        all_matches = [None] * len(texts)
+        for chunk, chunk_matches in zip(chunks, results):
+            for index, matches in zip(chunk, chunk_matches):
+                all_matches[index] = matches
+        return all_matches
+
+    def _find_matches_in_segment(self, segment: Segment, matches: list[list[dict]]) -> Iterator[Entity]:
+        # attributes to copy are the same for all entities of the segment
+        attrs_to_copy = [attr for attr_label in self.attrs_to_copy for attr in segment.attrs.get(label=attr_label)]
+
+        # only the best matching CUI (1st match candidate) is returned
+        # TODO should we create a normalization attributes for each CUI instead?
+        best_matches = [match_candidates[0] for match_candidates in matches]
+        ranges = [(match["start"], match["end"]) for match in best_matches]
+        extracted = span_utils.extract_separately(segment.text, segment.spans, ranges)
+        for match, (text, spans) in zip(best_matches, extracted):
             semtypes = list(match["semtypes"])
 
             # define label using the first semtype
@@ -289,13 +455,12 @@ class QuickUMLSMatcher(NEROperation):
                 spans=spans,
             )
 
-            for attr_label in self.attrs_to_copy:
-                for attr in segment.attrs.get(label=attr_label):
-                    copied_attr = attr.copy()
-                    entity.attrs.add(copied_attr)
-                    # handle provenance
-                    if self._prov_tracer is not None:
-                        self._prov_tracer.add_prov(copied_attr, self.description, [attr])
+            for attr in attrs_to_copy:
+                copied_attr = attr.copy()
+                entity.attrs.add(copied_attr)
+                # handle provenance
+                if self._prov_tracer is not None:
+                    self._prov_tracer.add_prov(copied_attr, self.description, [attr])
 
             norm_attr = UMLSNormAttribute(
                 cui=match["cui"],
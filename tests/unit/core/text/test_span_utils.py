@@ -10,6 +10,7 @@ from medkit.core.text.span_utils import (
     clean_up_gaps_in_normalized_spans,
     concatenate,
     extract,
+    extract_separately,
     insert,
     move,
     normalize_spans,
@@ -52,6 +53,28 @@ def test_extract():
     assert spans == [Span(0, 7), Span(18, 22)]
 
 
+def test_extract_separately():
+    text = "Hello, my name is John Doe."
+    spans = [Span(0, 13), ModifiedSpan(4, [Span(13, 20)]), Span(20, 30)]
+    ranges = [(18, 22), (0, 7), (5, 22), (3, 3)]
+    extracted = extract_separately(text, spans, ranges)
+    # same as extracting each range
+    assert extracted == [extract(text, spans, [r]) for r in ranges]
+    assert extracted[0] == ("John", [Span(21, 25)])
+    assert extracted[1] == ("Hello, ", [Span(0, 7)])
+    assert extracted[2] == (", my name is John", [Span(5, 13), ModifiedSpan(4, [Span(13, 20)]), Span(20, 25)])
+    assert extracted[3] == ("", [])
+
+
+def test_extract_separately_many_spans():
+    # spans of 1 or 2 chars, with a gap of 1 char between spans
+    spans = [Span(3 * i, 3 * i + 1 + i % 2) for i in range(100)]
+    text = "x" * sum(s.length for s in spans)
+    ranges = [(0, 1), (10, 40), (5, 6), (140, len(text)), (0, len(text))]
+    extracted = extract_separately(text, spans, ranges)
+    assert extracted == [extract(text, spans, [r]) for r in ranges]
+
+
 def test_insert():
     text = "Hello, my name is John Doe."
     spans = [Span(0, 27)]
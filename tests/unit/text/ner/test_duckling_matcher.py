@@ -1,4 +1,9 @@
+import json
+import time
+from urllib.parse import parse_qsl
+
 import pytest
+import requests
 
 from medkit.core import Attribute, ProvTracer
 from medkit.core.text import Segment, Span
@@ -43,19 +48,19 @@ class _MockHTTPResponse:
     def __init__(self, data):
         self.status_code = 200
         self.data = data
-
-    def json(self):
-        return self.data
+        self.content = json.dumps(data).encode()
 
     def raise_for_status(self):
         pass
 
 
-def _mock_requests_get(url, timeout):
-    return _MockHTTPResponse(None)
+def _mock_session_request(self, method, url, timeout, data=None, headers=None):
+    if method == "GET":
+        return _MockHTTPResponse(None)
 
+    assert headers == {"Content-Type": "application/x-www-form-urlencoded"}
+    data = dict(parse_qsl(data))
 
-def _mock_requests_post(url, data, timeout):
     if "dims" not in data:
         response_data = [_TIME_RESPONSE_DATA, _DURATION_RESPONSE_DATA]
     else:
@@ -68,9 +73,8 @@ def _mock_requests_post(url, data, timeout):
 
 
 @pytest.fixture(scope="module", autouse=True)
-def _mocked_requests(module_mocker):
-    module_mocker.patch("requests.get", _mock_requests_get)
-    module_mocker.patch("requests.post", _mock_requests_post)
+def _mocked_session(module_mocker):
+    module_mocker.patch("requests.Session.request", _mock_session_request)
 
 
 def _get_sentence_segment(text=_TEXT):
@@ -108,6 +112,23 @@ def test_single_dim():
     assert attr.metadata["version"] == "MOCK"
 
 
+def test_payload(mocker):
+    request_spy = mocker.patch("requests.Session.request", autospec=True, side_effect=_mock_session_request)
+
+    matcher = DucklingMatcher(
+        output_label=_OUTPUT_LABEL,
+        version="MOCK",
+        locale="en",
+        dims=["time", "duration"],
+    )
+    # special chars must be properly encoded
+    text = _TEXT + " & 100% = 72h+ é"
+    matcher.run([_get_sentence_segment(text)])
+
+    payload = request_spy.call_args.kwargs["data"]
+    assert dict(parse_qsl(payload)) == {"locale": "en", "dims": '["time", "duration"]', "text": text}
+
+
 def test_multiple_dims():
     sentence = _get_sentence_segment()
 
@@ -141,6 +162,28 @@ def test_multiple_dims():
     assert attr_2.value == _DURATION_VALUE
 
 
+def test_unfiltered_dims(mocker):
+    def _mock_request_ignoring_dims(self, method, url, timeout, data=None, headers=None):
+        # behave as if dims were not sent to the server
+        if data is not None:
+            data = "&".join(param for param in data.split("&") if not param.startswith("dims="))
+        return _mock_session_request(self, method, url, timeout, data, headers)
+
+    mocker.patch("requests.Session.request", _mock_request_ignoring_dims)
+
+    matcher = DucklingMatcher(
+        output_label=_OUTPUT_LABEL,
+        version="MOCK",
+        locale="en",
+        dims=["time"],
+    )
+    # server returns all dims but only the requested dims are kept, with one warning
+    with pytest.warns(UserWarning, match="Dims are not properly filtered") as record:
+        entities = matcher.run([_get_sentence_segment()])
+    assert len(record) == 1
+    assert [e.label for e in entities] == ["time"]
+
+
 def test_all_dims():
     sentence = _get_sentence_segment()
 
@@ -153,6 +196,138 @@ def test_all_dims():
     assert len(entities) == 2
 
 
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_multiple_segments(max_workers):
+    sentence_1 = _get_sentence_segment()
+    sentence_2 = Segment(
+        label="sentence",
+        spans=[Span(100, 100 + len(_TEXT))],
+        text=_TEXT,
+    )
+
+    matcher = DucklingMatcher(
+        output_label=_OUTPUT_LABEL,
+        version="MOCK",
+        locale="en",
+        dims=["time"],
+        max_workers=max_workers,
+    )
+    entities = matcher.run([sentence_1, sentence_2])
+    assert len(entities) == 2
+
+    # matches are mapped back to the segment they were found in
+    assert entities[0].spans == [Span(25, 38)]
+    assert entities[1].spans == [Span(125, 138)]
+
+
+def _mock_slow_session_request(self, method, url, timeout, data=None, headers=None):
+    # leave time for concurrent requests to overlap
+    time.sleep(0.05)
+    return _mock_session_request(self, method, url, timeout, data, headers)
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_cache(mocker, max_workers):
+    request_spy = mocker.patch("requests.Session.request", autospec=True, side_effect=_mock_slow_session_request)
+    other_text = _TEXT + " again"
+    sentences = [_get_sentence_segment(text) for text in [_TEXT, other_text] * 4]
+
+    matcher = DucklingMatcher(
+        output_label=_OUTPUT_LABEL,
+        version="MOCK",
+        locale="en",
+        dims=["time"],
+        max_workers=max_workers,
+    )
+    entities = matcher.run(sentences)
+    assert len(entities) == 8
+    # identical texts are sent only once, even concurrently (in addition to connection check)
+    assert request_spy.call_count == 3
+    # cached matches are not shared between entities
+    value_1 = entities[0].attrs.get(label=_OUTPUT_LABEL)[0].value
+    value_2 = entities[2].attrs.get(label=_OUTPUT_LABEL)[0].value
+    assert value_1 == value_2
+    assert value_1 is not value_2
+
+    # texts already sent are not sent again in following calls
+    matcher.run(sentences)
+    assert request_spy.call_count == 3
+
+    # caching across calls can be disabled
+    matcher = DucklingMatcher(
+        output_label=_OUTPUT_LABEL,
+        version="MOCK",
+        locale="en",
+        dims=["time"],
+        max_workers=max_workers,
+        cache_size=0,
+    )
+    matcher.run(sentences)
+    matcher.run(sentences)
+    assert request_spy.call_count == 8
+
+
+def test_lazy_connection_check(mocker):
+    request_spy = mocker.patch("requests.Session.request", autospec=True, side_effect=_mock_session_request)
+
+    matcher = DucklingMatcher(output_label=_OUTPUT_LABEL, version="MOCK", locale="en", cache_size=0)
+    # no request sent at init
+    assert request_spy.call_count == 0
+
+    matcher.run([_get_sentence_segment()])
+    matcher.run([_get_sentence_segment()])
+    methods = [call.args[1] for call in request_spy.call_args_list]
+    assert methods == ["GET", "POST", "POST"]
+
+
+def test_server_failures(mocker):
+    request_mock = mocker.patch("requests.Session.request", side_effect=requests.ConnectionError())
+
+    matcher = DucklingMatcher(output_label=_OUTPUT_LABEL, version="MOCK", locale="en")
+    for _ in range(3):
+        with pytest.raises(requests.ConnectionError):
+            matcher.run([_get_sentence_segment()])
+    assert request_mock.call_count == 3
+
+    # server is not reached anymore after too many consecutive failures
+    with pytest.raises(requests.ConnectionError, match="failed 3 times in a row"):
+        matcher.run([_get_sentence_segment()])
+    assert request_mock.call_count == 3
+
+
+def test_without_orjson(mocker):
+    mocker.patch("medkit.text.ner.duckling_matcher.orjson", None)
+
+    matcher = DucklingMatcher(output_label=_OUTPUT_LABEL, version="MOCK", locale="en")
+    entities = matcher.run([_get_sentence_segment()])
+    assert len(entities) == 2
+    assert entities[0].attrs.get(label=_OUTPUT_LABEL)[0].value == _TIME_VALUE
+
+
+def test_iter_run():
+    matcher = DucklingMatcher(output_label=_OUTPUT_LABEL, version="MOCK", locale="en")
+    entities = matcher.iter_run([_get_sentence_segment(), _get_sentence_segment()])
+    assert not isinstance(entities, list)
+    assert [e.label for e in entities] == ["time", "duration", "time", "duration"]
+
+
+def test_empty_segments(mocker):
+    request_spy = mocker.patch("requests.Session.request", autospec=True, side_effect=_mock_session_request)
+
+    matcher = DucklingMatcher(output_label=_OUTPUT_LABEL, version="MOCK", locale="en")
+    entities = matcher.run([_get_sentence_segment(""), _get_sentence_segment(" \n"), _get_sentence_segment()])
+    assert len(entities) == 2
+    # only the non-empty segment was sent (in addition to connection check)
+    assert request_spy.call_count == 2
+
+
+@pytest.mark.parametrize(("max_workers", "expected_pool_size"), [(4, 32), (64, 64)])
+def test_connection_pool_size(max_workers, expected_pool_size):
+    matcher = DucklingMatcher(output_label=_OUTPUT_LABEL, version="MOCK", locale="en", max_workers=max_workers)
+    adapter = matcher._session.get_adapter("http://localhost:8000")
+    assert adapter._pool_maxsize == expected_pool_size
+
+
 def test_attrs_to_copy():
     sentence = _get_sentence_segment()
     # copied attribute
@@ -1,3 +1,4 @@
+import gc
 from pathlib import Path
 
 import pytest
@@ -9,7 +10,8 @@ import spacy.cli
 
 from medkit.core import Attribute, ProvTracer
 from medkit.core.text import Segment, Span, UMLSNormAttribute
-from medkit.text.ner.quick_umls_matcher import QuickUMLSMatcher
+from medkit.text.ner import quick_umls_matcher
+from medkit.text.ner.quick_umls_matcher import QuickUMLSMatcher, _split_by_length
 
 # QuickUMLSMatcher is a wrapper around 3d-party quickumls.core.QuickUMLS,
 # which requires a QuickUMLS install to work. A QuickUMLS install can be
@@ -134,6 +136,103 @@ def test_multiple_matches():
     assert norm_attr_2.term == "asthma"
 
 
+@pytest.mark.parametrize("match_from_doc", [True, False])
+def test_multiple_segments(mocker, match_from_doc):
+    mocker.patch("medkit.text.ner.quick_umls_matcher._MATCH_FROM_DOC_SUPPORTED", match_from_doc)
+
+    sentence_1 = _get_sentence_segment("The patient has asthma.")
+    sentence_2 = _get_sentence_segment("No history of illness.")
+    sentence_3 = _get_sentence_segment("The patient has type 1 diabetes.")
+
+    umls_matcher = QuickUMLSMatcher(version="2021AB", language="ENG")
+    entities = umls_matcher.run([sentence_1, sentence_2, sentence_3])
+
+    # matches are mapped back to the segment they were found in
+    assert len(entities) == 2
+    assert entities[0].text == "asthma"
+    assert entities[0].spans == [Span(16, 22)]
+    assert entities[1].text == "type 1 diabetes"
+    assert entities[1].spans == [Span(16, 31)]
+
+
+def test_parallel():
+    texts = ["The patient has asthma.", "No history of illness.", "The patient has type 1 diabetes."]
+    sentences = [_get_sentence_segment(text) for text in texts * 3]
+
+    umls_matcher = QuickUMLSMatcher(version="2021AB", language="ENG", n_jobs=2)
+    try:
+        entities = umls_matcher.run(sentences)
+    finally:
+        umls_matcher.close()
+
+    # same results and order as sequential matching
+    expected_entities = QuickUMLSMatcher(version="2021AB", language="ENG").run(sentences)
+    assert [(e.text, e.spans) for e in entities] == [(e.text, e.spans) for e in expected_entities]
+
+
+def test_parallel_all_cpus(mocker):
+    mocker.patch("os.cpu_count", return_value=2)
+    sentences = [_get_sentence_segment("The patient has asthma."), _get_sentence_segment("He has type 1 diabetes.")]
+
+    umls_matcher = QuickUMLSMatcher(version="2021AB", language="ENG", n_jobs=-1)
+    try:
+        entities = umls_matcher.run(sentences)
+        assert umls_matcher._executor._max_workers == 2
+    finally:
+        umls_matcher.close()
+    assert [e.text for e in entities] == ["asthma", "type 1 diabetes"]
+
+
+@pytest.mark.parametrize("n_jobs", [0, -2])
+def test_invalid_n_jobs(n_jobs):
+    with pytest.raises(ValueError, match="Invalid n_jobs"):
+        QuickUMLSMatcher(version="2021AB", language="ENG", n_jobs=n_jobs)
+
+
+def test_workers_stopped_on_deletion():
+    sentences = [_get_sentence_segment("The patient has asthma."), _get_sentence_segment("He has type 1 diabetes.")]
+
+    umls_matcher = QuickUMLSMatcher(version="2021AB", language="ENG", n_jobs=2)
+    umls_matcher.run(sentences)
+    executor = umls_matcher._executor
+    assert executor is not None
+
+    del umls_matcher
+    gc.collect()
+    with pytest.raises(RuntimeError, match="after shutdown"):
+        executor.submit(len, "")
+
+
+def test_split_by_length():
+    texts = ["a" * 10, "a" * 2, "a" * 7, "a" * 3, "a" * 5]
+    chunks = _split_by_length(texts, 2)
+    assert sorted(i for chunk in chunks for i in chunk) == list(range(len(texts)))
+    assert sorted(sum(len(texts[i]) for i in chunk) for chunk in chunks) == [13, 14]
+
+    # no empty chunks when there are less texts than chunks
+    assert _split_by_length(texts[:1], 2) == [[0]]
+
+
+def test_cache(mocker):
+    match_spy = mocker.patch.object(quick_umls_matcher, "_match_texts", wraps=quick_umls_matcher._match_texts)
+    asthma_text = "The patient has asthma."
+    diabetes_text = "The patient has type 1 diabetes."
+
+    umls_matcher = QuickUMLSMatcher(version="2021AB", language="ENG", cache_size=1)
+    entities = umls_matcher.run([_get_sentence_segment(asthma_text), _get_sentence_segment(asthma_text)])
+    assert [e.text for e in entities] == ["asthma", "asthma"]
+    # identical texts are matched only once
+    assert match_spy.call_args.args[1] == [asthma_text]
+
+    entities = umls_matcher.run([_get_sentence_segment(asthma_text), _get_sentence_segment(diabetes_text)])
+    assert [e.text for e in entities] == ["asthma", "type 1 diabetes"]
+    assert match_spy.call_args.args[1] == [diabetes_text]
+
+    # least recently used text was evicted
+    umls_matcher.run([_get_sentence_segment(asthma_text)])
+    assert match_spy.call_args.args[1] == [asthma_text]
+
+
 def test_language():
     sentence = _get_sentence_segment("Le patient fait de l'Asthme.")
 
@@ -151,6 +250,15 @@ def test_language():
     assert norm_attr.term == "Asthme"
 
 
+def test_install_update():
+    QuickUMLSMatcher.add_install("/path/to/install_1", version="2099AA", language="ENG")
+    assert QuickUMLSMatcher._get_path_to_install("2099AA", "ENG") == "/path/to/install_1"
+
+    # cached install path is invalidated when registering a new install
+    QuickUMLSMatcher.add_install("/path/to/install_2", version="2099AA", language="ENG")
+    assert QuickUMLSMatcher._get_path_to_install("2099AA", "ENG") == "/path/to/install_2"
+
+
 def test_lowercase():
     sentence = _get_sentence_segment("Le patient fait de l'asthme.")
 
@@ -187,6 +295,26 @@ def test_ambiguous_match():
     assert len(norm_attrs) == 1
 
 
+def test_iter_run():
+    sentences = [_get_sentence_segment("The patient has asthma."), _get_sentence_segment("He has type 1 diabetes.")]
+
+    umls_matcher = QuickUMLSMatcher(version="2021AB", language="ENG")
+    entities = umls_matcher.iter_run(sentences)
+    assert not isinstance(entities, list)
+    assert [e.text for e in entities] == ["asthma", "type 1 diabetes"]
+
+
+def test_empty_segments(mocker):
+    match_spy = mocker.patch.object(quick_umls_matcher, "_match_texts", wraps=quick_umls_matcher._match_texts)
+    sentences = [_get_sentence_segment(""), _get_sentence_segment(" \n"), _get_sentence_segment("He has asthma.")]
+
+    umls_matcher = QuickUMLSMatcher(version="2021AB", language="ENG")
+    entities = umls_matcher.run(sentences)
+    assert [e.text for e in entities] == ["asthma"]
+    # empty segments are not matched
+    assert match_spy.call_args.args[1] == ["He has asthma."]
+
+
 def test_attrs_to_copy():
     sentence = _get_sentence_segment("The patient has asthma.")
     # copied attribute